@@ -1,23 +1,59 @@
-from datetime import datetime
-from flask import Flask, render_template, request, jsonify
-from nba_api.stats.static import players
-from nba_api.stats.endpoints import PlayerGameLog
 import time
+PROCESS_STARTED = time.perf_counter()
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from flask import Flask, render_template, stream_template, request, jsonify, g
+from markupsafe import Markup
 
 import requests
 
+# Snapshot składu jest wspólny z API FastAPI (src/scripts/startup_snapshot.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'scripts'))
+from startup_snapshot import DEFAULT_SNAPSHOT_PATH, build_roster, load_snapshot
+
 app = Flask(__name__)
 
+# pandas i moduły nba_api importujemy dopiero tam, gdzie są potrzebne, żeby start był szybki
+SNAPSHOT_PATH = os.environ.get('NBA_STARTUP_SNAPSHOT', DEFAULT_SNAPSHOT_PATH)
+startup_metrics = {'startup_ms': None, 'roster_source': None, 'first_request_ms': None}
+
+# Cache sezonu zawodnika: wyrenderowane wiersze tabeli, średnie i kolumny do podświetlania linii
+GAME_LOG_CACHE_TTL = 600
+GAME_LOG_CACHE_SIZE = 256
+OVERLAY_COLUMNS = ['PTS', 'AST', 'REB', 'STL', 'BLK', 'TOV', 'FG3M', 'PF', 'DD', 'TD']
+COMBINED_STATS = {
+    'PTS_AST': ['PTS', 'AST'],
+    'PTS_REB': ['PTS', 'REB'],
+    'PTS_AST_REB': ['PTS', 'AST', 'REB']
+}
+game_log_cache = OrderedDict()
+game_log_cache_lock = threading.Lock()
+
+# Skład aktywnych zawodników: z gotowego snapshotu (src/scripts/fetch_nba_data.py) albo z nba_api
+@lru_cache(maxsize=1)
+def get_roster():
+    roster = load_snapshot(SNAPSHOT_PATH)
+    if roster is not None:
+        startup_metrics['roster_source'] = 'snapshot'
+        return roster
+
+    from nba_api.stats.static import players
+    startup_metrics['roster_source'] = 'nba_api'
+    return build_roster(players.get_active_players())  # Pobieramy tylko aktywnych zawodników
+
 # Funkcja pomocnicza do pobrania ID zawodnika na podstawie imienia i nazwiska
 def get_player_id(first_name, last_name):
-    player_dict = players.get_active_players()  # Pobieramy tylko aktywnych zawodników
-    for player in player_dict:
-        if player['first_name'].lower() == first_name.lower() and player['last_name'].lower() == last_name.lower():
-            return player['id']
-    return None
+    return get_roster()['name_index'].get((first_name.lower(), last_name.lower()))
 
 # Funkcja do pobrania logów z meczów danego zawodnika w sezonie
 def get_player_stats(player_id, season, retries=3, timeout=60):
+    from nba_api.stats.endpoints import PlayerGameLog
+
     for attempt in range(retries):
         try:
             game_log = PlayerGameLog(player_id=player_id, season=season, timeout=timeout)
@@ -69,20 +105,15 @@ def autocomplete():
     if not query:
         return jsonify([])
 
-    active_players = players.get_active_players()
     suggestions = []
     
-    for player in active_players:
-        full_name = f"{player['first_name']} {player['last_name']}".lower()
-        first_name = player['first_name'].lower()
-        last_name = player['last_name'].lower()
-        
+    for full_name, first_name, last_name, display_name in get_roster()['search_index']:
         if (query in full_name or 
             query in first_name or 
             query in last_name or 
             first_name.startswith(query) or 
             last_name.startswith(query)):
-            suggestions.append(f"{player['first_name']} {player['last_name']}")
+            suggestions.append(display_name)
 
     suggestions = sorted(list(set(suggestions)))
     return jsonify(suggestions[:10])
@@ -91,12 +122,69 @@ def autocomplete():
 def generate_seasons():
     current_year = datetime.now().year
     current_season_start = current_year if datetime.now().month >= 10 else current_year - 1
+    return build_seasons(current_season_start)
+
+@lru_cache(maxsize=4)
+def build_seasons(current_season_start):
+    roster = get_roster()
+    if roster['season_start'] == current_season_start:
+        return tuple(reversed(roster['seasons']))  # Snapshot trzyma sezony od najstarszego
     seasons = []
     for i in range(5):
         season_start = current_season_start - i
         season_end = season_start + 1
         seasons.append(f"{season_start}-{str(season_end)[-2:]}")
-    return seasons
+    return tuple(seasons)
+
+# Pobiera sezon z cache albo z nba_api; tabela renderuje się leniwie przy pierwszym wyświetleniu
+def get_game_log(player_id, season):
+    key = (player_id, season)
+    with game_log_cache_lock:
+        entry = game_log_cache.get(key)
+        if entry is not None and entry['expires_at'] > time.time():
+            game_log_cache.move_to_end(key)
+            return entry
+
+    stats_df = get_player_stats(player_id, season)
+    entry = {
+        'expires_at': time.time() + GAME_LOG_CACHE_TTL,
+        'averages': calculate_averages(stats_df),
+        'columns': {column: stats_df[column].tolist() for column in OVERLAY_COLUMNS},
+        'records': stats_df.to_dict(orient='records'),
+        'rows_html': None
+    }
+    with game_log_cache_lock:
+        game_log_cache[key] = entry
+        game_log_cache.move_to_end(key)
+        while len(game_log_cache) > GAME_LOG_CACHE_SIZE:
+            game_log_cache.popitem(last=False)
+    return entry
+
+# Strumieniuje wiersze tabeli; po pierwszym renderze zapamiętuje gotowy fragment HTML
+def stream_game_log_rows(entry):
+    if entry['rows_html'] is not None:
+        yield entry['rows_html']
+        return
+
+    chunks = []
+    for chunk in app.jinja_env.get_template('_game_log_rows.html').generate(stats=entry['records']):
+        chunks.append(chunk)
+        yield Markup(chunk)
+    entry['rows_html'] = Markup(''.join(chunks))
+
+# Numery wierszy (od 1), które pokrywają linię - nakładka na zbuforowaną tabelę
+def covered_rows(columns, stat_type, stat_value, over_under):
+    if stat_type in ['DD', 'TD']:
+        expected = 'YES' if over_under == 'over' else 'NO'
+        return [i + 1 for i, value in enumerate(columns[stat_type]) if value == expected]
+
+    stat_columns = COMBINED_STATS.get(stat_type, [stat_type])
+    if any(column not in columns for column in stat_columns):
+        return []
+    totals = [sum(values) for values in zip(*(columns[column] for column in stat_columns))]
+    if over_under == 'over':
+        return [i + 1 for i, value in enumerate(totals) if value > stat_value]
+    return [i + 1 for i, value in enumerate(totals) if value < stat_value]
 
 # Endpoint for checking the line
 @app.route('/check_line', methods=['POST'])
@@ -115,35 +203,10 @@ def check_line():
         if not player_id:
             return jsonify({"error": f"Player {player_name} not found."})
 
-        # Get player stats
-        stats_df = get_player_stats(player_id, season)
-
-        # Handle combined stats
-        if stat_type == 'PTS_AST':
-            stats_df['COMBINED'] = stats_df['PTS'] + stats_df['AST']
-            stat_column = 'COMBINED'
-        elif stat_type == 'PTS_REB':
-            stats_df['COMBINED'] = stats_df['PTS'] + stats_df['REB']
-            stat_column = 'COMBINED'
-        elif stat_type == 'PTS_AST_REB':
-            stats_df['COMBINED'] = stats_df['PTS'] + stats_df['AST'] + stats_df['REB']
-            stat_column = 'COMBINED'
-        else:
-            stat_column = stat_type
-
-        # Count how many times the stat exceeded or did not exceed the value
-        if over_under == 'over':
-            if stat_type in ['DD', 'TD']:
-                line_hits = stats_df[stats_df[stat_type] == 'YES'].shape[0]
-            else:
-                line_hits = stats_df[stats_df[stat_column] > stat_value].shape[0]
-        else:
-            if stat_type in ['DD', 'TD']:
-                line_hits = stats_df[stats_df[stat_type] == 'NO'].shape[0]
-            else:
-                line_hits = stats_df[stats_df[stat_column] < stat_value].shape[0]
-
-        total_games = stats_df.shape[0]
+        # Sezon z cache (ten sam co w search_player); linie liczy covered_rows, jak overlay
+        entry = get_game_log(player_id, season)
+        line_hits = len(covered_rows(entry['columns'], stat_type, stat_value, over_under))
+        total_games = len(entry['columns']['PTS'])
         hit_percentage = (line_hits / total_games) * 100 if total_games > 0 else 0
 
         stat_display = {
@@ -162,7 +225,7 @@ def check_line():
 @app.route('/')
 def index():
     seasons = generate_seasons()
-    return render_template('player_stats.html', seasons=seasons, player_name='', selected_season='', stats=None)
+    return render_template('player_stats.html', seasons=seasons, player_name='', selected_season='', game_log_rows=None)
 
 # Obsługuje dane z formularza
 @app.route('/search_player', methods=['POST'])
@@ -187,36 +250,51 @@ def search_player():
     if player_id is None:
         return f"Player {first_name} {last_name} not found."
 
-    stats_df = get_player_stats(player_id, season)
+    entry = get_game_log(player_id, season)
     
     # Handle line highlighting
     if all([stat_type, stat_value is not None, over_under]):
-        if stat_type in ['DD', 'TD']:
-            stats_df['covered'] = stats_df[stat_type] == 'YES' if over_under == 'over' else stats_df[stat_type] == 'NO'
-        else:
-            stats_df['covered'] = stats_df[stat_type] > stat_value if over_under == 'over' else stats_df[stat_type] < stat_value
+        highlighted_rows = covered_rows(entry['columns'], stat_type, stat_value, over_under)
     else:
-        stats_df['covered'] = False
-
-    averages = calculate_averages(stats_df)
+        highlighted_rows = []
 
+    has_games = len(entry['columns']['PTS']) > 0
     seasons = generate_seasons()
-    return render_template('player_stats.html', 
+    return stream_template('player_stats.html', 
                          seasons=seasons, 
                          player_name=player_name, 
                          selected_season=season, 
-                         stats=stats_df.to_dict(orient='records'), 
-                         avg_pts=averages['avg_pts'],
-                         avg_ast=averages['avg_ast'],
-                         avg_reb=averages['avg_reb'],
-                         avg_stl=averages['avg_stl'],
-                         avg_blk=averages['avg_blk'],
-                         avg_tov=averages['avg_tov'],
-                         avg_3pts=averages['avg_3pts'],
-                         avg_pf=averages['avg_pf'],
+                         game_log_rows=stream_game_log_rows(entry) if has_games else None, 
+                         covered_rows=highlighted_rows,
+                         **entry['averages'],
                          current_stat_type=stat_type,
                          current_stat_value=stat_value,
                          current_over_under=over_under)
 
+# Pomiar czasu startu i pierwszego żądania
+@app.before_request
+def start_request_timer():
+    if startup_metrics['first_request_ms'] is None:
+        g.request_started = time.perf_counter()
+
+@app.after_request
+def record_first_request(response):
+    if startup_metrics['first_request_ms'] is None and 'request_started' in g:
+        started = g.request_started
+        path = request.path
+
+        # Odpowiedzi strumieniowane kończą się dopiero po wysłaniu całego body, więc mierzymy przy zamknięciu
+        def on_close():
+            if startup_metrics['first_request_ms'] is None:
+                startup_metrics['first_request_ms'] = round((time.perf_counter() - started) * 1000, 2)
+                print(f"First request {path} served in {startup_metrics['first_request_ms']}ms")
+
+        response.call_on_close(on_close)
+    return response
+
+get_roster()
+startup_metrics['startup_ms'] = round((time.perf_counter() - PROCESS_STARTED) * 1000, 2)
+print(f"Startup complete in {startup_metrics['startup_ms']}ms (roster from {startup_metrics['roster_source']})")
+
 if __name__ == '__main__':
     app.run(debug=True)
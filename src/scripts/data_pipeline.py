@@ -0,0 +1,150 @@
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+# Cached stages older than this are refetched rather than resumed from
+STAGE_CACHE_MAX_AGE = 12 * 60 * 60
+
+
+class Stage(NamedTuple):
+    name: str
+    func: Callable[..., Any]
+
+
+class Output(NamedTuple):
+    path: str
+    leagues: List[str]
+    write: Callable[[Dict[str, Any], str], None]
+
+
+def stage_cache_path(cache_dir: str, league: str, stage: str) -> str:
+    return os.path.join(cache_dir, f"{league}.{stage}.json")
+
+
+def save_stage(path: str, data: Any):
+    # Write then rename so an interrupted run never leaves a half-written stage behind
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def load_stage(path: str) -> Any:
+    with open(path) as f:
+        return json.load(f)
+
+
+def has_fresh_stage(path: str) -> bool:
+    return os.path.exists(path) and time.time() - os.path.getmtime(path) < STAGE_CACHE_MAX_AGE
+
+
+def run_league(league: str, stages: List[Stage], cache_dir: str, fresh: bool = False) -> Dict[str, Any]:
+    """Run one league's stages in order, resuming after the last stage cached on disk"""
+    timings: Dict[str, Optional[float]] = {}
+    result = None
+    start_index = 0
+
+    if not fresh:
+        for index in range(len(stages) - 1, -1, -1):
+            path = stage_cache_path(cache_dir, league, stages[index].name)
+            if has_fresh_stage(path):
+                result = load_stage(path)
+                start_index = index + 1
+                for stage in stages[:start_index]:
+                    timings[stage.name] = None
+                break
+
+    for index, stage in enumerate(stages[start_index:], start_index):
+        started = time.perf_counter()
+        try:
+            result = stage.func() if index == 0 else stage.func(result)
+        except Exception as e:
+            timings[stage.name] = time.perf_counter() - started
+            return {'league': league, 'status': 'failed', 'stage': stage.name, 'error': str(e), 'timings': timings}
+        timings[stage.name] = time.perf_counter() - started
+        save_stage(stage_cache_path(cache_dir, league, stage.name), result)
+
+    return {'league': league, 'status': 'ok', 'output': result, 'timings': timings}
+
+
+def format_timings(timings: Dict[str, Optional[float]]) -> str:
+    return ", ".join(
+        f"{stage} (cached)" if seconds is None else f"{stage} {seconds:.2f}s"
+        for stage, seconds in timings.items()
+    )
+
+
+def run_pipeline(
+    stages_by_league: Dict[str, List[Stage]],
+    outputs: List[Output],
+    cache_dir: str,
+    leagues: Optional[List[str]] = None,
+    workers: Optional[int] = None,
+    fresh: bool = False
+) -> Dict[str, Any]:
+    """Run the given leagues (default: all) in worker processes, then write every output whose leagues are available
+
+    Leagues outside this run contribute their cached final stage, so retrying one failed league completes
+    the combined outputs. Stage caches are only cleared once every declared output has been written.
+    """
+    leagues = leagues or list(stages_by_league)
+    os.makedirs(cache_dir, exist_ok=True)
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers or len(leagues)) as executor:
+        futures = {
+            league: executor.submit(run_league, league, stages_by_league[league], cache_dir, fresh)
+            for league in leagues
+        }
+        results = {league: future.result() for league, future in futures.items()}
+
+    normalized = {}
+    failed = []
+    for league, result in results.items():
+        if result['status'] == 'ok':
+            normalized[league] = result['output']
+            print(f"{league}: {format_timings(result['timings'])}")
+        else:
+            failed.append(league)
+            print(f"{league}: failed in {result['stage']} stage: {result['error']} ({format_timings(result['timings'])})")
+
+    available = dict(normalized)
+    for league, stages in stages_by_league.items():
+        path = stage_cache_path(cache_dir, league, stages[-1].name)
+        if league not in results and has_fresh_stage(path):
+            available[league] = load_stage(path)
+            print(f"{league}: {stages[-1].name} (cached from an earlier run)")
+
+    pending = []
+    for output in outputs:
+        missing = [league for league in output.leagues if league not in available]
+        if missing:
+            pending.append(output)
+            if any(league in failed for league in missing):
+                print(f"Skipping {output.path}: missing {', '.join(missing)}")
+            continue
+        write_started = time.perf_counter()
+        os.makedirs(os.path.dirname(output.path), exist_ok=True)
+        output.write(available, output.path)
+        print(f"Wrote {output.path} in {time.perf_counter() - write_started:.2f}s")
+
+    if not pending:
+        # Every output was written; the next run should start from fresh upstream data
+        for league, stages in stages_by_league.items():
+            for stage in stages:
+                path = stage_cache_path(cache_dir, league, stage.name)
+                if os.path.exists(path):
+                    os.remove(path)
+        if not os.listdir(cache_dir):
+            shutil.rmtree(cache_dir)
+    elif failed:
+        print(f"Stage outputs kept in {cache_dir}; rerun to resume from the last good stage")
+    else:
+        print(f"Stage outputs kept in {cache_dir} until {', '.join(os.path.basename(o.path) for o in pending)} "
+              f"can be written by a run covering the remaining leagues")
+
+    print(f"Pipeline finished in {time.perf_counter() - started:.2f}s")
+    return normalized
@@ -1,8 +1,19 @@
 from nba_api.stats.static import players as nba_players, teams as nba_teams
 import requests
+import argparse
 import json
 import os
+import sys
 import time
+from data_pipeline import Output, Stage, run_pipeline
+from startup_snapshot import DEFAULT_SNAPSHOT_PATH, write_snapshot
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+CACHE_DIR = os.path.join(DATA_DIR, '.pipeline_cache')
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
 
 # NFL team mappings
 NFL_TEAMS = {
@@ -22,12 +33,12 @@ NHL_TEAMS = [
     'WSH', 'WPG'
 ]
 
-def get_nba_data():
+def fetch_nba():
     """Fetch NBA data using nba_api"""
     print("Fetching NBA data...")
-    all_players = nba_players.get_active_players()
-    all_teams = nba_teams.get_teams()
+    return {"players": nba_players.get_active_players(), "teams": nba_teams.get_teams()}
 
+def normalize_nba(raw):
     formatted_players = [{
         "id": player["id"],
         "full_name": player["full_name"],
@@ -36,7 +47,7 @@ def get_nba_data():
         "is_active": player["is_active"],
         "type": "player",
         "league": "NBA"
-    } for player in all_players]
+    } for player in raw["players"]]
 
     formatted_teams = [{
         "id": team["id"],
@@ -48,218 +59,227 @@ def get_nba_data():
         "year_founded": team["year_founded"],
         "type": "team",
         "league": "NBA"
-    } for team in all_teams]
+    } for team in raw["teams"]]
 
     return {"players": formatted_players, "teams": formatted_teams}
 
-def get_mlb_data():
+def fetch_mlb():
     """Fetch MLB data using MLB Stats API"""
     print("Fetching MLB data...")
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        # MLB Teams
-        teams_response = requests.get(
-            "https://statsapi.mlb.com/api/v1/teams?sportId=1",
-            headers=headers
-        )
-        teams_data = teams_response.json()
-        
-        formatted_teams = [{
-            "id": team["id"],
-            "full_name": team["name"],
-            "abbreviation": team.get("abbreviation", ""),
-            "type": "team",
-            "league": "MLB",
-            "venue": team.get("venue", {}).get("name", ""),
-            "division": team.get("division", {}).get("name", "")
-        } for team in teams_data.get("teams", [])]
-
-        # MLB Players (40-man roster for each team)
-        formatted_players = []
-        for team in teams_data.get("teams", []):
-            try:
-                roster_response = requests.get(
-                    f"https://statsapi.mlb.com/api/v1/teams/{team['id']}/roster/40man",
-                    headers=headers
-                )
-                roster_data = roster_response.json()
-                
-                for player in roster_data.get("roster", []):
-                    person = player.get("person", {})
-                    formatted_players.append({
-                        "id": person.get("id"),
-                        "full_name": person.get("fullName"),
-                        "type": "player",
-                        "league": "MLB",
-                        "team_id": team["id"],
-                        "position": player.get("position", {}).get("abbreviation", "")
-                    })
-                time.sleep(0.5)  # Add delay to avoid rate limiting
-            except Exception as e:
-                print(f"Error fetching roster for MLB team {team['id']}: {e}")
-
-        return {"players": formatted_players, "teams": formatted_teams}
-    except Exception as e:
-        print(f"Error fetching MLB data: {e}")
-        return {"players": [], "teams": []}
-
-def get_nhl_data():
+    teams_response = requests.get(
+        "https://statsapi.mlb.com/api/v1/teams?sportId=1",
+        headers=HEADERS
+    )
+    teams_response.raise_for_status()
+    teams_data = teams_response.json()
+
+    # MLB Players (40-man roster for each team)
+    rosters = {}
+    for team in teams_data.get("teams", []):
+        try:
+            roster_response = requests.get(
+                f"https://statsapi.mlb.com/api/v1/teams/{team['id']}/roster/40man",
+                headers=HEADERS
+            )
+            rosters[str(team["id"])] = roster_response.json()
+            time.sleep(0.5)  # Add delay to avoid rate limiting
+        except Exception as e:
+            print(f"Error fetching roster for MLB team {team['id']}: {e}")
+
+    return {"teams": teams_data, "rosters": rosters}
+
+def normalize_mlb(raw):
+    teams = raw["teams"].get("teams", [])
+    formatted_teams = [{
+        "id": team["id"],
+        "full_name": team["name"],
+        "abbreviation": team.get("abbreviation", ""),
+        "type": "team",
+        "league": "MLB",
+        "venue": team.get("venue", {}).get("name", ""),
+        "division": team.get("division", {}).get("name", "")
+    } for team in teams]
+
+    formatted_players = []
+    for team in teams:
+        for player in raw["rosters"].get(str(team["id"]), {}).get("roster", []):
+            person = player.get("person", {})
+            formatted_players.append({
+                "id": person.get("id"),
+                "full_name": person.get("fullName"),
+                "type": "player",
+                "league": "MLB",
+                "team_id": team["id"],
+                "position": player.get("position", {}).get("abbreviation", "")
+            })
+
+    return {"players": formatted_players, "teams": formatted_teams}
+
+def fetch_nhl():
     """Fetch NHL data using NHL API"""
     print("Fetching NHL data...")
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        formatted_teams = []
-        formatted_players = []
-
-        # First, get team info
-        teams_response = requests.get(
-            "https://api-web.nhle.com/v1/standings/now",
-            headers=headers
-        )
-        teams_data = teams_response.json()
+    # First, get team info
+    standings_response = requests.get(
+        "https://api-web.nhle.com/v1/standings/now",
+        headers=HEADERS
+    )
+    standings_response.raise_for_status()
+    standings_data = standings_response.json()
+
+    # Then fetch roster for each team
+    rosters = {}
+    for team in standings_data.get('standings', []):
+        abbreviation = team.get('teamAbbrev', {}).get('default')
+        try:
+            roster_response = requests.get(
+                f"https://api-web.nhle.com/v1/roster/{abbreviation}/current",
+                headers=HEADERS
+            )
+            
+            if roster_response.status_code == 200:
+                rosters[abbreviation] = roster_response.json()
+            
+            time.sleep(0.5)  # Add delay to avoid rate limiting
+        except Exception as e:
+            print(f"Error fetching roster for NHL team {abbreviation}: {e}")
+
+    return {"standings": standings_data, "rosters": rosters}
+
+def normalize_nhl(raw):
+    # Extract team info from standings
+    formatted_teams = [{
+        "id": team.get('teamAbbrev', {}).get('default'),
+        "full_name": team.get('teamName', {}).get('default'),
+        "abbreviation": team.get('teamAbbrev', {}).get('default'),
+        "type": "team",
+        "league": "NHL"
+    } for team in raw["standings"].get('standings', [])]
+
+    formatted_players = []
+    for team in formatted_teams:
+        roster_data = raw["rosters"].get(team['abbreviation'], {})
+        # Process forwards, defensemen, and goalies
+        for category in ['forwards', 'defensemen', 'goalies']:
+            for player in roster_data.get(category, []):
+                formatted_players.append({
+                    "id": player.get('id'),
+                    "full_name": f"{player.get('firstName', {}).get('default', '')} {player.get('lastName', {}).get('default', '')}".strip(),
+                    "type": "player",
+                    "league": "NHL",
+                    "team_id": team['id'],
+                    "position": player.get('positionCode', '')
+                })
+
+    return {"players": formatted_players, "teams": formatted_teams}
+
+def fetch_nfl():
+    """Fetch NFL data using ESPN API"""
+    print("Fetching NFL data...")
+    # First get all teams data
+    teams_response = requests.get(
+        "http://site.api.espn.com/apis/site/v2/sports/football/nfl/teams",
+        headers=HEADERS
+    )
+    teams_response.raise_for_status()
+
+    # Fetch all active NFL players
+    players_url = "https://sports.core.api.espn.com/v3/sports/football/nfl/athletes?limit=20000&active=true"
+    players_response = requests.get(players_url, headers=HEADERS)
+    if players_response.status_code != 200:
+        raise Exception(f"Failed to fetch NFL players. Status code: {players_response.status_code}")
+
+    return {"teams": teams_response.json(), "players": players_response.json()}
+
+def normalize_nfl(raw):
+    formatted_teams = []
+
+    # Process teams from the correct path in the response
+    teams_list = raw["teams"].get('sports', [{}])[0].get('leagues', [{}])[0].get('teams', [])
+
+    for team_entry in teams_list:
+        team = team_entry.get('team', {})
+        team_id = str(team.get('id', ''))
+        team_abbrev = next((abbrev for abbrev, id in NFL_TEAMS.items() 
+                          if str(id) == team_id), None)
         
-        # Extract team info from standings
-        for team in teams_data.get('standings', []):
+        if team_abbrev:
             formatted_teams.append({
-                "id": team.get('teamAbbrev', {}).get('default'),
-                "full_name": team.get('teamName', {}).get('default'),
-                "abbreviation": team.get('teamAbbrev', {}).get('default'),
+                "id": team_id,
+                "full_name": team.get('displayName', ''),
+                "abbreviation": team_abbrev,
                 "type": "team",
-                "league": "NHL"
+                "league": "NFL",
+                "location": team.get('location', '')
             })
 
-        # Then fetch roster for each team
-        for team in formatted_teams:
-            try:
-                roster_response = requests.get(
-                    f"https://api-web.nhle.com/v1/roster/{team['abbreviation']}/current",
-                    headers=headers
-                )
-                
-                if roster_response.status_code == 200:
-                    roster_data = roster_response.json()
-                    
-                    # Process forwards, defensemen, and goalies
-                    for category in ['forwards', 'defensemen', 'goalies']:
-                        for player in roster_data.get(category, []):
-                            formatted_players.append({
-                                "id": player.get('id'),
-                                "full_name": f"{player.get('firstName', {}).get('default', '')} {player.get('lastName', {}).get('default', '')}".strip(),
-                                "type": "player",
-                                "league": "NHL",
-                                "team_id": team['id'],
-                                "position": player.get('positionCode', '')
-                            })
-                
-                time.sleep(0.5)  # Add delay to avoid rate limiting
-            except Exception as e:
-                print(f"Error fetching roster for NHL team {team['abbreviation']}: {e}")
-
-        return {"players": formatted_players, "teams": formatted_teams}
-    except Exception as e:
-        print(f"Error fetching NHL data: {e}")
-        return {"players": [], "teams": []}
-
-def get_nfl_data():
-    """Fetch NFL data using ESPN API"""
-    print("Fetching NFL data...")
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-
-        formatted_teams = []
-        formatted_players = []
-
-        # First get all teams data
-        teams_response = requests.get(
-            "http://site.api.espn.com/apis/site/v2/sports/football/nfl/teams",
-            headers=headers
-        )
-        teams_data = teams_response.json()
-
-        # Process teams from the correct path in the response
-        teams_list = teams_data.get('sports', [{}])[0].get('leagues', [{}])[0].get('teams', [])
-        
-        # Create team mapping for later use
-        team_mapping = {}
-        
-        for team_entry in teams_list:
-            team = team_entry.get('team', {})
-            team_id = str(team.get('id', ''))
-            team_abbrev = next((abbrev for abbrev, id in NFL_TEAMS.items() 
-                              if str(id) == team_id), None)
-            
-            if team_abbrev:
-                formatted_teams.append({
-                    "id": team_id,
-                    "full_name": team.get('displayName', ''),
-                    "abbreviation": team_abbrev,
-                    "type": "team",
-                    "league": "NFL",
-                    "location": team.get('location', '')
-                })
-                team_mapping[team_id] = team_abbrev
+    formatted_players = [{
+        "id": player.get('id', ''),
+        "full_name": player.get('displayName', ''),
+        "type": "player",
+        "league": "NFL",
+        "team_id": player.get('team', {}).get('id', ''),
+        "position": player.get('position', {}).get('abbreviation', '')
+    } for player in raw["players"].get('items', []) if player.get('active', False)]  # Only include active players
 
-        # Fetch all active NFL players
-        try:
-            players_url = "https://sports.core.api.espn.com/v3/sports/football/nfl/athletes?limit=20000&active=true"
-            players_response = requests.get(players_url, headers=headers)
-            
-            if players_response.status_code == 200:
-                players_data = players_response.json()
-                
-                # Process players
-                for player in players_data.get('items', []):
-                    if player.get('active', False):  # Only include active players
-                        formatted_players.append({
-                            "id": player.get('id', ''),
-                            "full_name": player.get('displayName', ''),
-                            "type": "player",
-                            "league": "NFL",
-                            "team_id": player.get('team', {}).get('id', ''),
-                            "position": player.get('position', {}).get('abbreviation', '')
-                        })
-            else:
-                print(f"Failed to fetch NFL players. Status code: {players_response.status_code}")
-                
-        except Exception as e:
-            print(f"Error fetching NFL players: {e}")
+    return {"players": formatted_players, "teams": formatted_teams}
+
+# Declared per-league stages; each stage's output is cached under CACHE_DIR until a full run succeeds
+LEAGUE_STAGES = {
+    "NBA": [Stage("fetch", fetch_nba), Stage("normalize", normalize_nba)],
+    "MLB": [Stage("fetch", fetch_mlb), Stage("normalize", normalize_mlb)],
+    "NHL": [Stage("fetch", fetch_nhl), Stage("normalize", normalize_nhl)],
+    "NFL": [Stage("fetch", fetch_nfl), Stage("normalize", normalize_nfl)]
+}
 
-        return {"players": formatted_players, "teams": formatted_teams}
-    except Exception as e:
-        print(f"Error fetching NFL data: {e}")
-        return {"players": [], "teams": []}
+def write_json(data, path):
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
 
-def fetch_all_sports_data():
-    """Fetch and combine data from all sports"""
-    sports_data = {
-        "NBA": get_nba_data(),
-        "MLB": get_mlb_data(),
-        "NHL": get_nhl_data(),
-        "NFL": get_nfl_data()
-    }
+def write_sports_data(normalized, path):
+    write_json({league: normalized[league] for league in LEAGUE_STAGES}, path)
 
-    # Create data directory if it doesn't exist
-    os.makedirs('src/data', exist_ok=True)
+def write_nba_data(normalized, path):
+    # nba_data.json predates the multi-league format and has no "league" field
+    write_json({
+        kind: [{key: value for key, value in entry.items() if key != "league"} for entry in entries]
+        for kind, entries in normalized["NBA"].items()
+    }, path)
 
-    # Save to JSON file
-    with open('src/data/sports_data.json', 'w') as f:
-        json.dump(sports_data, f, indent=2)
+def write_nba_snapshot(normalized, path):
+    write_snapshot(normalized["NBA"]["players"], path)
+
+OUTPUTS = [
+    Output(os.path.join(DATA_DIR, 'sports_data.json'), list(LEAGUE_STAGES), write_sports_data),
+    Output(os.path.join(DATA_DIR, 'nba_data.json'), ["NBA"], write_nba_data),
+    Output(DEFAULT_SNAPSHOT_PATH, ["NBA"], write_nba_snapshot)
+]
+
+def fetch_all_sports_data(leagues=None, workers=None, fresh=False):
+    """Fetch, normalize and write data for the given leagues (default: all) in one pass"""
+    leagues = leagues or list(LEAGUE_STAGES)
+    normalized = run_pipeline(
+        LEAGUE_STAGES,
+        OUTPUTS,
+        CACHE_DIR,
+        leagues=leagues,
+        workers=workers,
+        fresh=fresh
+    )
 
     # Print summary
-    for league, data in sports_data.items():
+    for league, data in normalized.items():
         print(f"\n{league} Summary:")
         print(f"Teams: {len(data['teams'])}")
         print(f"Players: {len(data['players'])}")
 
-    print("\nSports data successfully saved to src/data/sports_data.json")
+    return len(normalized) == len(leagues)
 
 if __name__ == "__main__":
-    fetch_all_sports_data()
+    parser = argparse.ArgumentParser(description="Fetch team and player data for all leagues")
+    parser.add_argument("--leagues", nargs="+", choices=list(LEAGUE_STAGES), help="Leagues to fetch (default: all)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per league)")
+    parser.add_argument("--fresh", action="store_true", help="Ignore cached stage outputs from a failed run")
+    args = parser.parse_args()
+
+    if not fetch_all_sports_data(args.leagues, args.workers, args.fresh):
+        sys.exit(1)
@@ -0,0 +1,146 @@
+import math
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+BOOTSTRAP_SEED = 2024
+BOOTSTRAP_RESAMPLES = 2000
+CONFIDENCE_LEVEL = 0.95
+
+# Upper bound on resampled cells (resamples x games) so a single line stays within a few ms
+MAX_BOOTSTRAP_CELLS = 400_000
+
+
+def bootstrap_intervals(
+    values: np.ndarray,
+    hits: np.ndarray,
+    resamples: int = BOOTSTRAP_RESAMPLES,
+    confidence: float = CONFIDENCE_LEVEL,
+    seed: int = BOOTSTRAP_SEED
+) -> Dict[str, Any]:
+    """Percentile bootstrap CIs for the hit rate and the stat mean, resampled in one array operation"""
+    n = len(values)
+    resamples = max(1, min(resamples, MAX_BOOTSTRAP_CELLS // n))
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, n, size=(resamples, n))
+
+    hit_rates = hits[idx].mean(axis=1) * 100
+    means = values[idx].mean(axis=1)
+
+    tail = (1 - confidence) / 2 * 100
+    bounds = [tail, 100 - tail]
+    hit_low, hit_high = np.percentile(hit_rates, bounds)
+    mean_low, mean_high = np.percentile(means, bounds)
+
+    return {
+        'resamples': int(resamples),
+        'confidence': confidence,
+        'hit_rate_ci': [round(float(hit_low), 1), round(float(hit_high), 1)],
+        'mean_ci': [round(float(mean_low), 2), round(float(mean_high), 2)]
+    }
+
+
+def empirical_cdf(values: np.ndarray) -> List[Dict[str, float]]:
+    """Empirical CDF as (value, P(X <= value)) points over the observed values"""
+    unique, counts = np.unique(values, return_counts=True)
+    cumulative = np.cumsum(counts) / len(values)
+    return [
+        {'value': float(value), 'p': round(float(p), 4)}
+        for value, p in zip(unique, cumulative)
+    ]
+
+
+def _poisson_pmf(mean: float, support: np.ndarray) -> np.ndarray:
+    ratios = np.empty(len(support))
+    ratios[0] = math.exp(-mean)
+    ratios[1:] = mean / support[1:]
+    return np.cumprod(ratios)
+
+
+def _negative_binomial_pmf(r: float, p: float, support: np.ndarray) -> np.ndarray:
+    ratios = np.empty(len(support))
+    ratios[0] = p ** r
+    ratios[1:] = (support[1:] - 1 + r) / support[1:] * (1 - p)
+    return np.cumprod(ratios)
+
+
+def _line_probability(pmf: np.ndarray, line: float, over_under: str) -> float:
+    cdf = np.cumsum(pmf)
+    if over_under == 'over':
+        below = math.floor(line)
+        return float(1 - cdf[below]) if below >= 0 else 1.0
+    below = math.ceil(line) - 1
+    return float(cdf[below]) if below >= 0 else 0.0
+
+
+def fit_count_distribution(values: np.ndarray, line: float, over_under: str) -> Optional[Dict[str, Any]]:
+    """Fit Poisson and (for overdispersed data) negative binomial, keep the lower-AIC model"""
+    # Only count stats fit a count distribution; percentages and other fractional stats get no fit
+    if not np.all(values == np.rint(values)):
+        return None
+
+    counts = values.astype(np.int64)
+    if counts.min() < 0:
+        return None
+
+    mean = float(counts.mean())
+    var = float(counts.var(ddof=1)) if len(counts) > 1 else 0.0
+    if mean <= 0:
+        return None
+
+    support = np.arange(max(int(counts.max()), math.floor(line) + 1, 0) * 2 + 10)
+    candidates = []
+
+    pmf = _poisson_pmf(mean, support)
+    log_lik = float(np.log(np.maximum(pmf[counts], 1e-300)).sum())
+    candidates.append({
+        'distribution': 'poisson',
+        'params': {'mu': round(mean, 3)},
+        'aic': 2 * 1 - 2 * log_lik,
+        'pmf': pmf
+    })
+
+    if var > mean:
+        # Method of moments: var = mu + mu^2 / r
+        r = mean ** 2 / (var - mean)
+        p = r / (r + mean)
+        pmf = _negative_binomial_pmf(r, p, support)
+        log_lik = float(np.log(np.maximum(pmf[counts], 1e-300)).sum())
+        candidates.append({
+            'distribution': 'negative_binomial',
+            'params': {'r': round(r, 3), 'p': round(p, 4)},
+            'aic': 2 * 2 - 2 * log_lik,
+            'pmf': pmf
+        })
+
+    best = min(candidates, key=lambda c: c['aic'])
+    return {
+        'distribution': best['distribution'],
+        'params': best['params'],
+        'aic': round(best['aic'], 2),
+        'line_probability': round(_line_probability(best['pmf'], line, over_under) * 100, 1)
+    }
+
+
+def analyze_line(
+    values: List[float],
+    hits: List[bool],
+    line: float,
+    over_under: str,
+    fit_distribution: bool = True,
+    seed: int = BOOTSTRAP_SEED
+) -> Dict[str, Any]:
+    """Bootstrap CIs, empirical CDF and a fitted count distribution for one line"""
+    started = time.perf_counter()
+    if not values:
+        return {}
+
+    values_arr = np.asarray(values, dtype=np.float64)
+    hits_arr = np.asarray(hits, dtype=np.float64)
+
+    analytics = bootstrap_intervals(values_arr, hits_arr, seed=seed)
+    analytics['ecdf'] = empirical_cdf(values_arr)
+    analytics['fit'] = fit_count_distribution(values_arr, line, over_under) if fit_distribution else None
+    analytics['compute_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return analytics
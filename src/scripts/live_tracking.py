@@ -0,0 +1,257 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+POLL_INTERVAL = 15.0
+SUBSCRIBER_QUEUE_SIZE = 100
+MAX_CONSECUTIVE_FAILURES = 5
+SCOREBOARD_TTL = 30.0
+
+# Live boxscore statistic keys mapped onto the PlayerGameLog column names used elsewhere
+LIVE_STAT_KEYS = {
+    'PTS': 'points',
+    'REB': 'reboundsTotal',
+    'AST': 'assists',
+    'STL': 'steals',
+    'BLK': 'blocks',
+    'TOV': 'turnovers',
+    'FG3M': 'threePointersMade',
+    'PF': 'foulsPersonal'
+}
+
+GAME_STATUS_FINAL = 3
+
+
+def fetch_live_boxscore(game_id: str) -> Dict[str, Any]:
+    """Fetch the live boxscore for a game from the NBA live data feed"""
+    from nba_api.live.nba.endpoints import boxscore
+    return boxscore.BoxScore(game_id=game_id).get_dict()['game']
+
+
+def fetch_live_games() -> List[Dict[str, Any]]:
+    """Fetch today's games from the NBA live scoreboard"""
+    from nba_api.live.nba.endpoints import scoreboard
+    games = scoreboard.ScoreBoard().get_dict()['scoreboard']['games']
+    return [{
+        'game_id': game['gameId'],
+        'status': game['gameStatus'],
+        'status_text': game['gameStatusText'],
+        'home_team': game['homeTeam']['teamTricode'],
+        'away_team': game['awayTeam']['teamTricode']
+    } for game in games]
+
+
+def normalize_boxscore(game: Dict[str, Any]) -> Dict[int, Dict[str, int]]:
+    """Flatten both teams' players into {player_id: {PTS, REB, ...}}"""
+    player_stats = {}
+    for side in ['homeTeam', 'awayTeam']:
+        for player in game.get(side, {}).get('players', []):
+            statistics = player.get('statistics', {})
+            player_stats[player['personId']] = {
+                stat: statistics.get(key, 0) or 0 for stat, key in LIVE_STAT_KEYS.items()
+            }
+    return player_stats
+
+
+def compute_deltas(
+    previous: Dict[int, Dict[str, int]],
+    current: Dict[int, Dict[str, int]]
+) -> Dict[int, Dict[str, int]]:
+    """Per-player stat changes between two normalized boxscores, omitting unchanged players"""
+    deltas = {}
+    for player_id, stats in current.items():
+        before = previous.get(player_id, {})
+        changed = {
+            stat: value - before.get(stat, 0)
+            for stat, value in stats.items()
+            if value != before.get(stat, 0)
+        }
+        if changed:
+            deltas[player_id] = changed
+    return deltas
+
+
+class GamePoller:
+    """Polls one game's boxscore and fans stat deltas out to all subscriber queues"""
+
+    def __init__(
+        self,
+        game_id: str,
+        interval: float = POLL_INTERVAL,
+        fetch_boxscore: Callable[[str], Dict[str, Any]] = fetch_live_boxscore,
+        on_stop: Optional[Callable[[str], None]] = None
+    ):
+        self.game_id = game_id
+        self.interval = interval
+        self.fetch_boxscore = fetch_boxscore
+        self.on_stop = on_stop
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.player_stats: Dict[int, Dict[str, int]] = {}
+        self.game_status: Optional[int] = None
+        self.updated_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopped = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'type': 'snapshot',
+            'game_id': self.game_id,
+            'game_status': self.game_status,
+            'updated_at': self.updated_at,
+            'players': self.player_stats
+        }
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        if self.updated_at is not None:
+            queue.put_nowait(self.snapshot())
+        self.subscribers.add(queue)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+        if not self.subscribers:
+            self.stop()
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if not self._stopped and self.on_stop:
+            self.on_stop(self.game_id)
+        self._stopped = True
+
+    def _broadcast(self, event: Dict[str, Any]):
+        for queue in self.subscribers:
+            if queue.full():
+                # Slow subscriber: drop its oldest event rather than stall the poller
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def _poll_once(self, game: Dict[str, Any]) -> Optional[int]:
+        current = normalize_boxscore(game)
+        deltas = compute_deltas(self.player_stats, current)
+        status = game.get('gameStatus')
+        first_poll = self.updated_at is None
+
+        self.player_stats = current
+        self.game_status = status
+        self.updated_at = time.time()
+
+        if first_poll:
+            self._broadcast(self.snapshot())
+        elif deltas:
+            self._broadcast({
+                'type': 'delta',
+                'game_id': self.game_id,
+                'game_status': status,
+                'updated_at': self.updated_at,
+                'players': {
+                    player_id: {'delta': delta, 'stats': current[player_id]}
+                    for player_id, delta in deltas.items()
+                }
+            })
+        return status
+
+    async def _run(self):
+        failures = 0
+        while self.subscribers:
+            try:
+                game = await asyncio.to_thread(self.fetch_boxscore, self.game_id)
+                status = self._poll_once(game)
+                failures = 0
+            except Exception as e:
+                failures += 1
+                print(f"Error polling live boxscore for game {self.game_id} "
+                      f"({failures}/{MAX_CONSECUTIVE_FAILURES}): {repr(e)}")
+                if failures >= MAX_CONSECUTIVE_FAILURES:
+                    self._broadcast({'type': 'error', 'game_id': self.game_id, 'detail': "Live boxscore unavailable"})
+                    self._task = None
+                    self.stop()
+                    return
+                await asyncio.sleep(self.interval)
+                continue
+
+            if status == GAME_STATUS_FINAL:
+                self._broadcast({'type': 'final', 'game_id': self.game_id})
+                self._task = None
+                self.stop()
+                return
+
+            await asyncio.sleep(self.interval)
+
+
+class LiveTracker:
+    """Registry keeping at most one GamePoller per active game, plus a short-lived scoreboard cache"""
+
+    def __init__(
+        self,
+        interval: float = POLL_INTERVAL,
+        fetch_boxscore: Callable[[str], Dict[str, Any]] = fetch_live_boxscore,
+        fetch_games: Callable[[], List[Dict[str, Any]]] = fetch_live_games,
+        scoreboard_ttl: float = SCOREBOARD_TTL
+    ):
+        self.interval = interval
+        self.fetch_boxscore = fetch_boxscore
+        self.fetch_games = fetch_games
+        self.scoreboard_ttl = scoreboard_ttl
+        self.pollers: Dict[str, GamePoller] = {}
+        self._games: List[Dict[str, Any]] = []
+        self._games_expires_at = 0.0
+        self._games_lock: Optional[asyncio.Lock] = None
+
+    async def live_games(self) -> List[Dict[str, Any]]:
+        """Today's scoreboard, fetched upstream at most once per scoreboard_ttl"""
+        if self._games_lock is None:
+            self._games_lock = asyncio.Lock()
+        async with self._games_lock:
+            if time.monotonic() >= self._games_expires_at:
+                self._games = await asyncio.to_thread(self.fetch_games)
+                self._games_expires_at = time.monotonic() + self.scoreboard_ttl
+            return self._games
+
+    def subscribe(self, game_id: str) -> asyncio.Queue:
+        poller = self.pollers.get(game_id)
+        if poller is None:
+            poller = GamePoller(
+                game_id,
+                interval=self.interval,
+                fetch_boxscore=self.fetch_boxscore,
+                on_stop=self._remove
+            )
+            self.pollers[game_id] = poller
+        return poller.subscribe()
+
+    def unsubscribe(self, game_id: str, queue: asyncio.Queue):
+        poller = self.pollers.get(game_id)
+        if poller is not None:
+            poller.unsubscribe(queue)
+
+    def active_games(self) -> Dict[str, int]:
+        return {game_id: len(poller.subscribers) for game_id, poller in self.pollers.items()}
+
+    def _remove(self, game_id: str):
+        self.pollers.pop(game_id, None)
+
+
+COMBINED_STATS = {
+    'PTS_AST': ['PTS', 'AST'],
+    'PTS_REB': ['PTS', 'REB'],
+    'PTS_AST_REB': ['PTS', 'AST', 'REB']
+}
+
+LINE_STAT_TYPES = set(LIVE_STAT_KEYS) | set(COMBINED_STATS) | {'DD', 'TD'}
+
+
+def line_status(stats: Dict[str, int], stat_type: str, stat_value: float, over_under: str) -> Dict[str, Any]:
+    """Current value of the tracked stat and whether the line is hit right now"""
+    if stat_type in ['DD', 'TD']:
+        doubles = sum(1 for stat in ['PTS', 'REB', 'AST', 'STL', 'BLK'] if stats.get(stat, 0) >= 10)
+        achieved = doubles >= (2 if stat_type == 'DD' else 3)
+        return {'value': 'YES' if achieved else 'NO', 'hit': achieved if over_under == 'over' else not achieved}
+
+    current = sum(stats.get(stat, 0) for stat in COMBINED_STATS.get(stat_type, [stat_type]))
+    hit = current > stat_value if over_under == 'over' else current < stat_value
+    return {'value': current, 'hit': hit}
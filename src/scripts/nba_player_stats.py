@@ -1,17 +1,76 @@
-from datetime import datetime
-from nba_api.stats.static import players
-from nba_api.stats.endpoints import PlayerGameLog
 import time
+PROCESS_STARTED = time.perf_counter()
+
+import asyncio
+import json
+import os
 import requests
-from fastapi import FastAPI, Query, HTTPException, Header, Depends
+from fastapi import FastAPI, Query, HTTPException, Header, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from typing import List, Dict, Union, Optional, Any
 from pydantic import BaseModel, Field
-import jwt
 from functools import lru_cache
+from live_tracking import LINE_STAT_TYPES, LiveTracker, line_status
+from token_verification import JWKSCache, TokenVerifier, TokenVerificationError, fetch_jwks_from_url
+from startup_snapshot import DEFAULT_SNAPSHOT_PATH, build_roster, current_season_start, load_snapshot
 
 app = FastAPI()
 
+# pandas and the nba_api endpoint modules are imported on the paths that use them so cold starts stay cheap
+SNAPSHOT_PATH = os.environ.get('NBA_STARTUP_SNAPSHOT', DEFAULT_SNAPSHOT_PATH)
+startup_metrics: Dict[str, Any] = {
+    'import_ms': round((time.perf_counter() - PROCESS_STARTED) * 1000, 2),
+    'startup_ms': None,
+    'roster_source': None,
+    'first_request_ms': None,
+    'first_request_path': None
+}
+
+# One upstream boxscore poller per live game, shared by every connected subscriber
+live_tracker = LiveTracker()
+LIVE_HEARTBEAT_SECONDS = 20
+
+# Real JWT verification is enabled by setting SUPABASE_URL; without it tokens are only checked for presence
+SUPABASE_URL = os.environ.get('SUPABASE_URL', '').rstrip('/')
+token_verifier: Optional[TokenVerifier] = None
+if SUPABASE_URL:
+    token_verifier = TokenVerifier(
+        JWKSCache(lambda: fetch_jwks_from_url(f"{SUPABASE_URL}/auth/v1/.well-known/jwks.json")),
+        audience=os.environ.get('SUPABASE_JWT_AUDIENCE', 'authenticated'),
+        issuer=f"{SUPABASE_URL}/auth/v1"
+    )
+
+@app.on_event("startup")
+def start_token_verifier():
+    if token_verifier:
+        token_verifier.jwks.start()
+
+@app.on_event("shutdown")
+def stop_token_verifier():
+    if token_verifier:
+        token_verifier.jwks.stop()
+
+@app.on_event("startup")
+def warm_roster():
+    get_roster()
+    startup_metrics['startup_ms'] = round((time.perf_counter() - PROCESS_STARTED) * 1000, 2)
+    print(f"Startup complete in {startup_metrics['startup_ms']}ms "
+          f"(imports {startup_metrics['import_ms']}ms, roster from {startup_metrics['roster_source']})")
+
+@app.middleware("http")
+async def record_first_request(request: Request, call_next):
+    if startup_metrics['first_request_ms'] is not None:
+        return await call_next(request)
+
+    started = time.perf_counter()
+    response = await call_next(request)
+    if startup_metrics['first_request_ms'] is None:
+        startup_metrics['first_request_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        startup_metrics['first_request_path'] = request.url.path
+        print(f"First request {request.url.path} served in {startup_metrics['first_request_ms']}ms")
+    return response
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -27,6 +86,7 @@ class LineCheckRequest(BaseModel):
     stat_type: str
     stat_value: float
     over_under: str
+    analytics: bool = False
 
 class PlayerStatsResponse(BaseModel):
     stats: List[Dict[str, Any]]  # Changed to Any to accept any type including None
@@ -37,28 +97,51 @@ class PlayerStatsResponse(BaseModel):
     class Config:
         arbitrary_types_allowed = True
 
-async def verify_token(authorization: str = Header(...)) -> str:
+def check_token(token: str) -> str:
     try:
-        if not authorization.startswith('Bearer '):
-            raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-        token = authorization.split(' ')[1]
-        # In production, you would verify the token with Supabase
-        # For now, we'll just check if it exists
         if not token:
             raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+        if token_verifier:
+            # Served from the verified-token cache or the local JWKS; no network on this path
+            token_verifier.verify(token)
         return token
+    except TokenVerificationError as e:
+        print(f"Token verification failed: {str(e)}")
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
     except Exception as e:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
 
-@lru_cache(maxsize=1000)
+async def verify_token(authorization: str = Header(...)) -> str:
+    if not authorization.startswith('Bearer '):
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+    return check_token(authorization.split(' ')[1])
+
+async def verify_stream_token(
+    authorization: Optional[str] = Header(None),
+    access_token: Optional[str] = Query(None)
+) -> str:
+    # Browser EventSource cannot set headers, so SSE routes also accept ?access_token=
+    if authorization:
+        return await verify_token(authorization)
+    return check_token(access_token or '')
+
+@lru_cache(maxsize=1)
+def get_roster() -> Dict[str, Any]:
+    roster = load_snapshot(SNAPSHOT_PATH)
+    if roster is not None:
+        startup_metrics['roster_source'] = 'snapshot'
+        return roster
+
+    from nba_api.stats.static import players
+    startup_metrics['roster_source'] = 'nba_api'
+    return build_roster(players.get_active_players())
+
 def get_player_id(first_name: str, last_name: str) -> Optional[int]:
-    player_dict = players.get_active_players()
-    for player in player_dict:
-        if player['first_name'].lower() == first_name.lower() and player['last_name'].lower() == last_name.lower():
-            return player['id']
-    return None
+    return get_roster()['name_index'].get((first_name.lower(), last_name.lower()))
 
 def get_player_stats(player_id: int, season: str, retries: int = 3, timeout: int = 60):
+    from nba_api.stats.endpoints import PlayerGameLog
+
     for attempt in range(retries):
         try:
             print(f"Attempting to fetch stats for player {player_id} for season {season} (Attempt {attempt + 1}/{retries})")
@@ -133,9 +216,11 @@ def calculate_averages(stats_list):
     }
 
 def generate_seasons() -> List[str]:
-    current_year = datetime.now().year
-    current_season_start = current_year if datetime.now().month >= 10 else current_year - 1
-    return [f"{year}-{str(year + 1)[-2:]}" for year in range(current_season_start - 4, current_season_start + 1)]
+    season_start = current_season_start()
+    roster = get_roster()
+    if roster['season_start'] == season_start:
+        return list(roster['seasons'])
+    return [f"{year}-{str(year + 1)[-2:]}" for year in range(season_start - 4, season_start + 1)]
 
 @app.get("/api/player-suggestions")
 async def get_player_suggestions(
@@ -146,20 +231,15 @@ async def get_player_suggestions(
         return []
 
     query = query.lower().strip()
-    active_players = players.get_active_players()
     suggestions = []
     
-    for player in active_players:
-        full_name = f"{player['first_name']} {player['last_name']}".lower()
-        first_name = player['first_name'].lower()
-        last_name = player['last_name'].lower()
-        
+    for full_name, first_name, last_name, display_name in get_roster()['search_index']:
         if (query in full_name or 
             query in first_name or 
             query in last_name or 
             first_name.startswith(query) or 
             last_name.startswith(query)):
-            suggestions.append(f"{player['first_name']} {player['last_name']}")
+            suggestions.append(display_name)
 
     return sorted(list(set(suggestions)))[:10]
 
@@ -200,7 +280,7 @@ async def get_stats(
 async def check_line(
     request: LineCheckRequest,
     token: str = Depends(verify_token)
-) -> Dict[str, Union[str, bool]]:
+) -> Dict[str, Any]:
     try:
         first_name, last_name = request.player_name.split(' ', 1)
     except ValueError:
@@ -229,21 +309,23 @@ async def check_line(
         else:
             stat_column = request.stat_type
 
-        # Count line hits
-        line_hits = 0
+        # Collect per-game values and line hits
+        game_values = []
+        game_hits = []
         for game in stats_list:
             if request.stat_type in ['DD', 'TD']:
-                if request.over_under == 'over':
-                    line_hits += 1 if game.get(request.stat_type) == 'YES' else 0
-                else:
-                    line_hits += 1 if game.get(request.stat_type) == 'NO' else 0
+                stat_value = 1 if game.get(request.stat_type) == 'YES' else 0
+                hit = stat_value == 1 if request.over_under == 'over' else stat_value == 0
             else:
                 stat_value = game.get(stat_column, 0) or 0
                 if request.over_under == 'over':
-                    line_hits += 1 if stat_value > request.stat_value else 0
+                    hit = stat_value > request.stat_value
                 else:
-                    line_hits += 1 if stat_value < request.stat_value else 0
+                    hit = stat_value < request.stat_value
+            game_values.append(stat_value)
+            game_hits.append(hit)
 
+        line_hits = sum(game_hits)
         total_games = len(stats_list)
         hit_percentage = (line_hits / total_games) * 100 if total_games > 0 else 0
 
@@ -254,11 +336,113 @@ async def check_line(
         }.get(request.stat_type, request.stat_type)
 
         message = f"Line {request.over_under} {request.stat_value} {stat_display} hit {line_hits}/{total_games} times ({hit_percentage:.1f}%)"
-        return {"message": message, "success": True}
+        response = {"message": message, "success": True}
+
+        if request.analytics:
+            from line_analytics import analyze_line
+            response["analytics"] = analyze_line(
+                game_values,
+                game_hits,
+                request.stat_value,
+                request.over_under,
+                fit_distribution=request.stat_type not in ['DD', 'TD']
+            )
+
+        return response
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.get("/api/live/games")
+async def get_live_games(token: str = Depends(verify_token)) -> Dict[str, Any]:
+    try:
+        games = await live_tracker.live_games()
+    except Exception as e:
+        print(f"Error fetching live scoreboard: {str(e)}")
+        raise HTTPException(status_code=502, detail="Failed to fetch live scoreboard")
+
+    return {"games": games, "tracked": live_tracker.active_games()}
+
+@app.get("/api/live/{game_id}/stream")
+async def stream_live_game(
+    game_id: str,
+    http_request: Request,
+    player: Optional[str] = Query(None),
+    stat_type: Optional[str] = Query(None),
+    stat_value: Optional[float] = Query(None),
+    over_under: Optional[str] = Query(None),
+    token: str = Depends(verify_stream_token)
+) -> StreamingResponse:
+    if stat_type is not None and stat_type not in LINE_STAT_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported stat type for live tracking: {stat_type}")
+
+    try:
+        games = await live_tracker.live_games()
+    except Exception as e:
+        print(f"Error fetching live scoreboard: {str(e)}")
+        raise HTTPException(status_code=502, detail="Failed to fetch live scoreboard")
+    # Only games on today's scoreboard get a poller, so bogus IDs never reach upstream
+    if game_id not in {game['game_id'] for game in games}:
+        raise HTTPException(status_code=404, detail=f"Game {game_id} is not on today's scoreboard")
+
+    player_id = None
+    if player:
+        try:
+            first_name, last_name = player.split(' ', 1)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Please provide both first and last name")
+        player_id = get_player_id(first_name, last_name)
+        if not player_id:
+            raise HTTPException(status_code=404, detail=f"Player {player} not found")
+
+    track_line = player_id is not None and all([stat_type, stat_value is not None, over_under])
+
+    async def event_stream():
+        queue = live_tracker.subscribe(game_id)
+        last_line_status = None
+        try:
+            while not await http_request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=LIVE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                if event['type'] in ['final', 'error']:
+                    yield format_sse(event['type'], event)
+                    break
+
+                if player_id is not None:
+                    player_event = event['players'].get(player_id)
+                    if player_event is None:
+                        continue
+                    event = {**event, 'players': {player_id: player_event}}
+
+                yield format_sse(event['type'], event)
+
+                if track_line:
+                    player_event = event['players'][player_id]
+                    stats = player_event['stats'] if event['type'] == 'delta' else player_event
+                    status = line_status(stats, stat_type, stat_value, over_under)
+                    if last_line_status is None or status['hit'] != last_line_status['hit']:
+                        yield format_sse('line', {'player_id': player_id, **status})
+                    last_line_status = status
+        finally:
+            live_tracker.unsubscribe(game_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/startup-metrics")
+async def get_startup_metrics(token: str = Depends(verify_token)) -> Dict[str, Any]:
+    return startup_metrics
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8888)
@@ -0,0 +1,72 @@
+import os
+import pickle
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_MAX_AGE_DAYS = 7
+DEFAULT_SNAPSHOT_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'nba_startup.snapshot'
+)
+
+
+def current_season_start() -> int:
+    now = datetime.now()
+    return now.year if now.month >= 10 else now.year - 1
+
+
+def build_roster(active_players: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Precompute the lookups the API needs from players.get_active_players()"""
+    season_start = current_season_start()
+    name_index = {}
+    search_index = []
+    for player in active_players:
+        first_name = player['first_name'].lower()
+        last_name = player['last_name'].lower()
+        # Keep the first match, as the original linear scan did
+        name_index.setdefault((first_name, last_name), player['id'])
+        search_index.append((
+            f"{first_name} {last_name}",
+            first_name,
+            last_name,
+            f"{player['first_name']} {player['last_name']}"
+        ))
+
+    return {
+        'version': SNAPSHOT_VERSION,
+        'created_at': datetime.now().isoformat(),
+        'season_start': season_start,
+        'seasons': [f"{year}-{str(year + 1)[-2:]}" for year in range(season_start - 4, season_start + 1)],
+        'name_index': name_index,
+        'search_index': search_index
+    }
+
+
+def write_snapshot(active_players: List[Dict[str, Any]], path: str = DEFAULT_SNAPSHOT_PATH) -> Dict[str, Any]:
+    roster = build_roster(active_players)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        pickle.dump(roster, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return roster
+
+
+def load_snapshot(path: str = DEFAULT_SNAPSHOT_PATH) -> Optional[Dict[str, Any]]:
+    """Load a snapshot written by the fetch scripts, or None if it is missing or stale"""
+    try:
+        with open(path, 'rb') as f:
+            roster = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError) as e:
+        print(f"Startup snapshot unavailable ({path}): {str(e)}")
+        return None
+
+    if roster.get('version') != SNAPSHOT_VERSION:
+        print(f"Ignoring startup snapshot with version {roster.get('version')}")
+        return None
+    if roster.get('season_start') != current_season_start():
+        print(f"Ignoring startup snapshot from the {roster.get('season_start')} season")
+        return None
+    age = datetime.now() - datetime.fromisoformat(roster['created_at'])
+    if age.days >= SNAPSHOT_MAX_AGE_DAYS:
+        print(f"Ignoring startup snapshot created {age.days} days ago")
+        return None
+    return roster
@@ -0,0 +1,160 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+from jose import jwt, JWTError
+
+JWKS_REFRESH_INTERVAL = 600
+JWKS_MIN_REFRESH_INTERVAL = 30
+VERIFIED_TOKEN_CACHE_SIZE = 10000
+CLOCK_SKEW_SECONDS = 30
+
+
+class TokenVerificationError(Exception):
+    pass
+
+
+def fetch_jwks_from_url(url: str, timeout: int = 10) -> Dict[str, Any]:
+    response = requests.get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+class JWKSCache:
+    """In-memory JWKS refreshed by a background thread so lookups never touch the network"""
+
+    def __init__(
+        self,
+        fetch_jwks: Callable[[], Dict[str, Any]],
+        refresh_interval: float = JWKS_REFRESH_INTERVAL
+    ):
+        self.fetch_jwks = fetch_jwks
+        self.refresh_interval = refresh_interval
+        self._keys: Dict[str, Dict[str, Any]] = {}
+        self._last_refresh = 0.0
+        self._lock = threading.Lock()
+        self._refresh_now = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> bool:
+        self._last_refresh = time.monotonic()
+        try:
+            jwks = self.fetch_jwks()
+        except Exception as e:
+            print(f"Error refreshing JWKS: {str(e)}")
+            return False
+
+        keys = {key['kid']: key for key in jwks.get('keys', []) if 'kid' in key}
+        with self._lock:
+            self._keys = keys
+        return True
+
+    def get_key(self, kid: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            key = self._keys.get(kid)
+        if key is None:
+            # Unknown kid usually means the signing key rotated; refresh off the request path
+            self._refresh_now.set()
+        return key
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.refresh()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="jwks-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._refresh_now.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._refresh_now.wait(timeout=self.refresh_interval)
+            # Rate-limit kid-miss refreshes so bogus tokens cannot hammer the JWKS endpoint
+            since_last = time.monotonic() - self._last_refresh
+            if since_last < JWKS_MIN_REFRESH_INTERVAL:
+                self._stop.wait(timeout=JWKS_MIN_REFRESH_INTERVAL - since_last)
+            self._refresh_now.clear()
+            if not self._stop.is_set():
+                self.refresh()
+
+
+class TokenVerifier:
+    """Verifies JWTs against a JWKSCache and remembers verified tokens until they expire"""
+
+    def __init__(
+        self,
+        jwks: JWKSCache,
+        audience: Optional[str] = None,
+        issuer: Optional[str] = None,
+        algorithms: Optional[List[str]] = None,
+        cache_size: int = VERIFIED_TOKEN_CACHE_SIZE
+    ):
+        self.jwks = jwks
+        self.audience = audience
+        self.issuer = issuer
+        self.algorithms = algorithms or ['RS256', 'ES256']
+        self.cache_size = cache_size
+        self._verified: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached_claims(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._verified.get(cache_key)
+            if entry is None:
+                return None
+            claims, expires_at = entry
+            if expires_at <= time.time():
+                del self._verified[cache_key]
+                return None
+            self._verified.move_to_end(cache_key)
+            return claims
+
+    def _remember(self, cache_key: str, claims: Dict[str, Any], expires_at: float):
+        with self._lock:
+            self._verified[cache_key] = (claims, expires_at)
+            self._verified.move_to_end(cache_key)
+            while len(self._verified) > self.cache_size:
+                self._verified.popitem(last=False)
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        cache_key = hashlib.sha256(token.encode()).hexdigest()
+        claims = self._cached_claims(cache_key)
+        if claims is not None:
+            return claims
+
+        try:
+            header = jwt.get_unverified_header(token)
+        except JWTError as e:
+            raise TokenVerificationError(f"Malformed token: {str(e)}")
+
+        key = self.jwks.get_key(header.get('kid'))
+        if key is None:
+            raise TokenVerificationError("Unknown signing key")
+
+        try:
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=self.algorithms,
+                audience=self.audience,
+                issuer=self.issuer,
+                options={'verify_aud': self.audience is not None, 'leeway': CLOCK_SKEW_SECONDS}
+            )
+        except JWTError as e:
+            raise TokenVerificationError(str(e))
+
+        if 'exp' not in claims:
+            raise TokenVerificationError("Token has no expiry")
+
+        self._remember(cache_key, claims, float(claims['exp']))
+        return claims